@@ -8,64 +8,56 @@ FastAPI backend providing:
 - /admin/* -> basic product CRUD (protected by a simple token param)
 - /analytics -> simple statistics
 """
-from fastapi import FastAPI, HTTPException, Body, Query
+from fastapi import FastAPI, HTTPException, Body, Query, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
-import json, re
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio, json, logging, re, threading, time
+from contextlib import asynccontextmanager
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from sqlalchemy import create_engine, event, text, table, column, select, func
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime
-import datetime
-
-# --- DB models (same as db_setup but minimal here) ---
-Base = declarative_base()
-
-class Product(Base):
-    __tablename__ = "products"
-    id = Column(Integer, primary_key=True)
-    product_id = Column(String, unique=True, index=True)
-    name = Column(String)
-    category = Column(String)
-    description = Column(Text)
-    ingredients = Column(Text)
-    price = Column(Float)
-    calories = Column(Integer)
-    prep_time = Column(String)
-    dietary_tags = Column(Text)
-    mood_tags = Column(Text)
-    allergens = Column(Text)
-    popularity_score = Column(Integer)
-    chef_special = Column(Boolean)
-    limited_time = Column(Boolean)
-    spice_level = Column(Integer)
-    image_prompt = Column(Text)
-    image_url = Column(Text)
-
-class Conversation(Base):
-    __tablename__ = "conversations"
-    id = Column(Integer, primary_key=True)
-    started_at = Column(DateTime, default=datetime.datetime.utcnow)
-    user_name = Column(String, default="guest")
-
-class Message(Base):
-    __tablename__ = "messages"
-    id = Column(Integer, primary_key=True)
-    conversation_id = Column(Integer, index=True)
-    sender = Column(String)  # "user" or "bot"
-    text = Column(Text)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    interest_score = Column(Integer, nullable=True)
+# DB models, FTS/stats triggers and schema creation/upgrade are defined once in db_setup
+from db_setup import Product, Conversation, Message, Stat, init_db, set_sqlite_pragmas
 
 # --- DB setup ---
-engine = create_engine("sqlite:///products.db", connect_args={"check_same_thread": False})
+init_db("sqlite:///products.db")
+engine = create_engine("sqlite:///products.db", pool_size=20, pool_pre_ping=True, connect_args={"check_same_thread": False})
+event.listen(engine, "connect", set_sqlite_pragmas)
 SessionLocal = sessionmaker(bind=engine)
-Base.metadata.create_all(bind=engine)
+
+def get_db():
+    """One session per request, always closed so the connection returns to the pool."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# async engine for the hot read/chat endpoints, so DB waits don't hold a worker thread
+async_engine = create_async_engine("sqlite+aiosqlite:///products.db")
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
 # --- FastAPI app ---
-app = FastAPI(title="FoodieBot API")
+@asynccontextmanager
+async def lifespan(app):
+    # catalog polling runs beside the server, so requests only read CATALOG.snapshot
+    task = asyncio.create_task(refresh_catalog())
+    yield
+    task.cancel()
+
+# orjson renders every response (faster than the stdlib json encoder)
+app = FastAPI(title="FoodieBot API", default_response_class=ORJSONResponse, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -84,6 +76,9 @@ class SearchResponse(BaseModel):
     image_url: Optional[str]
     score: float
 
+# upper bound on prices taken from clients (dollars); keeps cents finite and within int32
+MAX_PRICE = 100_000
+
 class StartConvResponse(BaseModel):
     conversation_id: int
 
@@ -116,192 +111,324 @@ NEGATIVE_FACTORS = {
     "delay_response": -5
 }
 
+# --- Signals as bits: extract_signals ORs bits into one int mask ---
+SIGNALS = ["specific_preferences","dietary_restrictions","budget_mention","mood_indication","question_asking",
+           "enthusiasm_words","price_inquiry","order_intent","hesitation","budget_concern","rejection"]
+SIGNAL_BITS = {name: 1 << i for i, name in enumerate(SIGNALS)}
+SPECIFIC_PREFERENCES, DIETARY_RESTRICTIONS, BUDGET_MENTION, MOOD_INDICATION, QUESTION_ASKING, \
+    ENTHUSIASM_WORDS, PRICE_INQUIRY, ORDER_INTENT, HESITATION, BUDGET_CONCERN, REJECTION = (SIGNAL_BITS[n] for n in SIGNALS)
+INTEREST_WEIGHTS = np.array([ENGAGEMENT_FACTORS.get(n, NEGATIVE_FACTORS.get(n)) for n in SIGNALS], dtype=np.int16)
+# interest score for every possible mask (2^11 entries), clamped to 0-100
+_mask_bits = (np.arange(1 << len(SIGNALS))[:, None] >> np.arange(len(SIGNALS))) & 1
+INTEREST_BY_MASK = np.clip(_mask_bits @ INTEREST_WEIGHTS, 0, 100).tolist()
+
 # --- Utilities: simple NLU heuristics (rules) ---
-def extract_signals(text):
-    text_l = text.lower()
-    signals = {}
+# keyword lists per signal; a keyword may raise several signals
+SIGNAL_KEYWORDS = {
     # specific preferences: detect keywords like "spicy", "korean", "burger", "tacos", etc
-    keywords = ["spicy","korean","burger","taco","tacos","pizza","vegan","vegetarian","gluten-free","gluten free","dessert","salad","breakfast","cheap","under $"]
-    if any(k in text_l for k in keywords):
-        signals["specific_preferences"] = True
+    "specific_preferences": ["spicy","korean","burger","taco","tacos","pizza","vegan","vegetarian","gluten-free","gluten free","dessert","salad","breakfast","cheap","under $"],
+    "dietary_restrictions": ["vegetarian","vegan","no meat","no pork","no beef","lactose","dairy-free","gluten-free","allergy","allergic"],
+    "mood_indication": ["adventurous","comfort","cheer","indulgent","healthy"],
+    "enthusiasm_words": ["amazing","love","perfect","awesome","great","delicious","yum"],
+    "order_intent": ["add to cart","i'll take","i will take","order now","i want to order","buy it","add it"],
+    "hesitation": ["maybe","not sure","i don't know","dont know"],
+    "rejection": ["too expensive","not for me","i don't like that","i dont like that"],
+    "budget_concern": ["too expensive","costly","expensive"],
+}
+# keyword -> OR of the signal bits it raises
+KEYWORD_SIGNALS = {}
+for _signal, _words in SIGNAL_KEYWORDS.items():
+    for _word in _words:
+        KEYWORD_SIGNALS[_word] = KEYWORD_SIGNALS.get(_word, 0) | SIGNAL_BITS[_signal]
+# one alternation over every keyword (longest first), wrapped in a lookahead so
+# overlapping keywords are all found, same as plain substring checks
+SIGNAL_RE = re.compile("(?=(" + "|".join(re.escape(k) for k in sorted(KEYWORD_SIGNALS, key=len, reverse=True)) + "))")
+BUDGET_RE = re.compile(r"\bunder\s*\$?(\d+)")
+PRICE_RE = re.compile(r"\$\d+")
 
-    # dietary restrictions
-    if any(word in text_l for word in ["vegetarian","vegan","no meat","no pork","no beef","lactose","dairy-free","gluten-free","allergy","allergic"]):
-        signals["dietary_restrictions"] = True
+def extract_signals(text):
+    """Returns (mask, budget): mask ORs SIGNAL_BITS, budget is the "under $N" amount or None."""
+    text_l = text.lower()
+    mask = 0
+    # keyword signals: single scan over the text
+    for m in SIGNAL_RE.finditer(text_l):
+        mask |= KEYWORD_SIGNALS[m.group(1)]
 
     # budget mention (simple)
-    m = re.search(r"\bunder\s*\$?(\d+)", text_l)
+    budget = None
+    m = BUDGET_RE.search(text_l)
     if m:
-        signals["budget_mention"] = float(m.group(1))
-    elif re.search(r"\$\d+", text_l):
-        signals["price_inquiry"] = True
-
-    # mood
-    if any(word in text_l for word in ["adventurous","comfort","cheer","indulgent","healthy"]):
-        signals["mood_indication"] = True
+        # capped at MAX_PRICE so the cents conversion stays finite
+        budget = min(float(m.group(1)), MAX_PRICE)
+        mask |= BUDGET_MENTION
+    elif PRICE_RE.search(text_l):
+        mask |= PRICE_INQUIRY
 
     # question
     if "?" in text_l:
-        signals["question_asking"] = True
-
-    # enthusiasm words
-    if any(word in text_l for word in ["amazing","love","perfect","awesome","great","delicious","yum"]):
-        signals["enthusiasm_words"] = True
-
-    # order intent
-    if any(phrase in text_l for phrase in ["add to cart","i'll take","i will take","order now","i want to order","buy it","add it"]):
-        signals["order_intent"] = True
-
-    # hesitation & rejection
-    if any(phrase in text_l for phrase in ["maybe","not sure","i don't know","dont know"]):
-        signals["hesitation"] = True
-    if any(phrase in text_l for phrase in ["too expensive","not for me","i don't like that","i dont like that"]):
-        signals["rejection"] = True
-
-    # budget concern
-    if any(phrase in text_l for phrase in ["too expensive","costly","expensive"]):
-        signals["budget_concern"] = True
-
-    return signals
-
-def compute_interest(signals):
-    score = 0
-    # positive additions
-    if signals.get("specific_preferences"):
-        score += ENGAGEMENT_FACTORS["specific_preferences"]
-    if signals.get("dietary_restrictions"):
-        score += ENGAGEMENT_FACTORS["dietary_restrictions"]
-    if "budget_mention" in signals and isinstance(signals["budget_mention"], (int,float)):
-        score += ENGAGEMENT_FACTORS["budget_mention"]
-    if signals.get("mood_indication"):
-        score += ENGAGEMENT_FACTORS["mood_indication"]
-    if signals.get("question_asking"):
-        score += ENGAGEMENT_FACTORS["question_asking"]
-    if signals.get("enthusiasm_words"):
-        score += ENGAGEMENT_FACTORS["enthusiasm_words"]
-    if signals.get("price_inquiry"):
-        score += ENGAGEMENT_FACTORS["price_inquiry"]
-    if signals.get("order_intent"):
-        score += ENGAGEMENT_FACTORS["order_intent"]
-
-    # negatives
-    if signals.get("hesitation"):
-        score += NEGATIVE_FACTORS["hesitation"]
-    if signals.get("budget_concern"):
-        score += NEGATIVE_FACTORS["budget_concern"]
-    if signals.get("rejection"):
-        score += NEGATIVE_FACTORS["rejection"]
-
-    # normalize to 0-100
-    if score < 0:
-        score = 0
-    if score > 100:
-        score = 100
-    return int(score)
-
-# --- Simple product scoring by compatibility ---
-def product_match_score(product: Product, signals):
-    # convert tags stored as JSON strings
-    try:
-        mood_tags = json.loads(product.mood_tags or "[]")
-    except:
-        mood_tags = []
+        mask |= QUESTION_ASKING
+
+    return mask, budget
+
+def compute_interest(mask):
+    # weighted sum of the set bits, normalized to 0-100 (precomputed per mask)
+    return INTEREST_BY_MASK[mask]
+
+# --- In-memory catalog (struct-of-arrays) for vectorized scoring ---
+# text relevance: TF-IDF vectors over each product's name, category, description,
+# ingredients and tags; a message is matched by cosine similarity
+STOP_WORDS = {"a","an","and","the","with","for","of","to","in","on","or","i","me","my","want","some","something","under"}
+RELEVANCE_WEIGHT = 30
+SHORTLIST_K = 30
+# dietary tags are packed into a bitmask, one bit per known tag
+DIETARY_VOCAB = ["vegetarian","vegan","contains_gluten","contains_dairy","contains_soy","gluten_free"]
+DIETARY_BITS = {tag: 1 << i for i, tag in enumerate(DIETARY_VOCAB)}
+DIETARY_CONFLICT = DIETARY_BITS["contains_gluten"] | DIETARY_BITS["contains_dairy"]
+
+# parsed tag sets keyed by product_id (with the row's updated_at), so JSON is
+# decoded once per product version rather than on every catalog rebuild
+_catalog_cache = {}
+
+def parse_tags(tags_json):
     try:
-        dietary_tags = json.loads(product.dietary_tags or "[]")
+        return frozenset(json.loads(tags_json or "[]"))
     except:
-        dietary_tags = []
-
-    score = 0.0
-    # match mood
-    if signals.get("mood_indication"):
-        score += 10
-    # match dietary: penalize products that conflict
-    if signals.get("dietary_restrictions"):
-        # if product has dietary tags that conflict (e.g., contains_gluten) penalize
-        if "contains_gluten" in dietary_tags or "contains_dairy" in dietary_tags:
-            score -= 20
-        else:
-            score += 15
-
-    # specific keywords matching product name/category
-    stext = ""
-    if signals.get("specific_preferences"):
-        stext = " ".join([k for k in ["spicy","korean","burger","taco","pizza","fried","chicken","vegan","vegetarian","salad"]])
-    # naive match: if name/category contains any of the user's tokens
-    # (We simplified: real implementation would use semantic matching / embeddings)
-    for token in ["spicy","korean","burger","taco","pizza","chicken","vegan","vegetarian","salad"]:
-        if token in (product.name or "").lower() or token in (product.category or "").lower():
-            score += 8
-
-    # price bias for budget_mention
-    if "budget_mention" in signals and isinstance(signals["budget_mention"], (int,float)):
-        if product.price <= signals["budget_mention"]:
-            score += 12
-        else:
-            score -= 8
-
-    # popularity contributes
-    score += (product.popularity_score or 0) / 20.0  # scale popularity
-
-    # spice preference: if user mentions 'spicy', boost spicy items
-    # we already matched keywords above; additionally use spice_level
-    if "spicy" in (stext):
-        score += (product.spice_level or 0) * 0.3
-
-    # final clamp
-    if score < 0:
-        score = 0
-    return score
+        return frozenset()
+
+def text_terms(text):
+    """Lowercased word terms (letters only, Unicode-aware so "jalapeño" stays whole)
+    with stop words dropped and a naive plural strip ("tacos" -> "taco")."""
+    terms = []
+    for w in re.findall(r"[^\W\d_]+", (text or "").lower()):
+        if w in STOP_WORDS:
+            continue
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        terms.append(w)
+    return terms
+
+def product_terms(row, cached):
+    # "contains_*" tags are left out so e.g. "gluten free" doesn't match gluten dishes
+    tags = [t.replace("_", " ") for t in cached["dietary"] | cached["mood"] if not t.startswith("contains_")]
+    return text_terms(" ".join([row.name or "", row.category or "", row.description or "", row.ingredients or ""] + tags))
+
+def dietary_mask(tags):
+    mask = 0
+    for tag in tags:
+        mask |= DIETARY_BITS.get(tag, 0)
+    return mask
+
+class CatalogSnapshot:
+    """Immutable struct-of-arrays copy of the products table used for scoring.
+    Never modified after construction; a rebuild creates a new snapshot."""
+
+    def __init__(self, rows, version):
+        self.version = version
+        for r in rows:
+            cached = _catalog_cache.get(r.product_id)
+            if cached is None or cached["updated_at"] != r.updated_at:
+                _catalog_cache[r.product_id] = {"updated_at": r.updated_at, "dietary": parse_tags(r.dietary_tags), "mood": parse_tags(r.mood_tags)}
+
+        self.product_ids = [r.product_id for r in rows]
+        self.names = [r.name for r in rows]
+        self.categories = [r.category for r in rows]
+        self.image_urls = [r.image_url for r in rows]
+        self.price_cents = np.array([r.price_cents or 0 for r in rows], dtype=np.int32)
+        self.pop = np.array([r.popularity_score or 0 for r in rows], dtype=np.int16)
+        self.spice = np.array([r.spice_level or 0 for r in rows], dtype=np.int8)
+        self.dietary_mask = np.array([dietary_mask(_catalog_cache[r.product_id]["dietary"]) for r in rows], dtype=np.uint32)
+
+        # L2-normalized TF-IDF weights as a term -> postings inverted index: term j's products
+        # are postings_products[postings_start[j]:postings_start[j + 1]], with their weights in
+        # postings_weights. Memory grows with (product, term) pairs, not products x vocabulary.
+        docs = [Counter(product_terms(r, _catalog_cache[r.product_id])) for r in rows]
+        self.vocab = {t: j for j, t in enumerate(sorted({t for d in docs for t in d}))}
+        term_ids = np.array([self.vocab[t] for d in docs for t in d], dtype=np.int64)
+        product_ids = np.repeat(np.arange(len(docs)), [len(d) for d in docs])
+        tf = np.array([n for d in docs for n in d.values()], dtype=np.float32)
+        df = np.bincount(term_ids, minlength=len(self.vocab))
+        self.idf = (np.log((1 + len(rows)) / (1 + df)) + 1).astype(np.float32)
+        weights = tf * self.idf[term_ids]
+        norms = np.sqrt(np.bincount(product_ids, weights=np.square(weights), minlength=len(rows)))
+        weights /= norms[product_ids]
+        order = np.argsort(term_ids, kind="stable")
+        self.postings_products = product_ids[order]
+        self.postings_weights = weights[order]
+        self.postings_start = np.concatenate(([0], np.cumsum(df)))
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def relevance(self, text):
+        """Cosine similarity between text and every product; all zeros if no term is known."""
+        cols = sorted({self.vocab[t] for t in text_terms(text) if t in self.vocab})
+        if not cols:
+            return np.zeros(len(self), dtype=np.float32)
+        query = self.idf[cols] / np.linalg.norm(self.idf[cols])
+        # walk only the query terms' postings, summing weight * query weight per product
+        spans = [slice(self.postings_start[j], self.postings_start[j + 1]) for j in cols]
+        products = np.concatenate([self.postings_products[s] for s in spans])
+        weights = np.concatenate([self.postings_weights[s] * q for s, q in zip(spans, query)])
+        return np.bincount(products, weights=weights, minlength=len(self)).astype(np.float32)
+
+    @classmethod
+    def load(cls, engine):
+        with Session(engine) as db:
+            version = db.query(func.max(Product.updated_at)).scalar()
+            rows = db.query(Product).with_entities(
+                Product.product_id, Product.name, Product.category, Product.price_cents,
+                Product.popularity_score, Product.spice_level, Product.image_url,
+                Product.description, Product.ingredients,
+                Product.dietary_tags, Product.mood_tags, Product.updated_at
+            ).order_by(Product.id).all()
+        return cls(rows, version)
+
+class Catalog:
+    """Holds the current CatalogSnapshot. Readers take `.snapshot` without locking and
+    never touch the database; rebuilds happen under a lock and publish a complete new
+    snapshot in one assignment. Other workers' writes are picked up by refresh(),
+    polled off the event loop by refresh_catalog()."""
+
+    VERSION_CHECK_SECONDS = 5
+
+    def __init__(self, engine):
+        self._engine = engine
+        self._lock = threading.RLock()
+        self.snapshot = CatalogSnapshot.load(engine)
+
+    def _publish(self, snapshot):
+        self.snapshot = snapshot
+        # cached replies are keyed on the old snapshot; drop them so they don't keep it alive
+        cached_reply.cache_clear()
+
+    def invalidate(self):
+        """Rebuild from the database and publish; call after writing products."""
+        with self._lock:
+            self._publish(CatalogSnapshot.load(self._engine))
+
+    def refresh(self):
+        """Rebuild and publish if max(updated_at) moved. Blocking: runs in a worker thread."""
+        with self._lock:
+            with Session(self._engine) as db:
+                version = db.query(func.max(Product.updated_at)).scalar()
+            if version != self.snapshot.version:
+                self._publish(CatalogSnapshot.load(self._engine))
+
+CATALOG = Catalog(engine)
+
+async def refresh_catalog():
+    """Background task: poll for catalog changes every VERSION_CHECK_SECONDS."""
+    while True:
+        await asyncio.sleep(Catalog.VERSION_CHECK_SECONDS)
+        try:
+            await asyncio.to_thread(CATALOG.refresh)
+        except Exception:
+            # keep serving the current snapshot; retried on the next poll
+            logging.getLogger(__name__).exception("catalog refresh failed")
+
+# --- Simple product scoring by compatibility ---
+def score_all(mask, budget_cents, relevance, shortlist, price_cents, pop, spice, dietary_mask):
+    """Scoring kernel over plain ints and arrays only (no dicts or objects), branch-free:
+    each signal contributes its flag (0/1) times its weight. budget_cents < 0 means no budget.
+    Products outside the shortlist or failing the budget/dietary filters score 0."""
+    has_mood = (mask & MOOD_INDICATION) != 0
+    has_diet = (mask & DIETARY_RESTRICTIONS) != 0
+    has_pref = (mask & SPECIFIC_PREFERENCES) != 0
+    has_budget = budget_cents >= 0
+
+    # same terms (and summation order) as the rules: mood, dietary, text match,
+    # budget, popularity, spice boost for specific preferences
+    scores = (np.full(len(pop), 10.0 * has_mood + 15 * has_diet) + RELEVANCE_WEIGHT * relevance
+              + 12 * has_budget + pop / 20.0 + has_pref * 0.3 * spice)
+
+    # dietary restrictions drop conflicting products (e.g., contains_gluten);
+    # a budget keeps only affordable ones
+    keep = shortlist & (((dietary_mask & DIETARY_CONFLICT) == 0) | (not has_diet)) & ((price_cents <= budget_cents) | (not has_budget))
+    return np.where(keep, np.maximum(scores, 0), 0)
+
+def product_match_score(mask, budget, relevance, catalog):
+    """Score every product in a CatalogSnapshot at once; returns an array aligned with
+    catalog.product_ids. relevance is catalog.relevance(message)."""
+    # text match: when the message mentions anything in the catalog, only the
+    # SHORTLIST_K most similar products stay candidates (partitioned, not fully sorted)
+    if relevance.any():
+        shortlist = np.zeros(len(catalog), dtype=bool)
+        shortlist[top_k(relevance, SHORTLIST_K)] = True
+    else:
+        shortlist = np.ones(len(catalog), dtype=bool)
+    budget_cents = -1 if budget is None else int(budget * 100)
+    return score_all(mask, budget_cents, relevance, shortlist,
+                     catalog.price_cents, catalog.pop, catalog.spice, catalog.dietary_mask)
+
+def top_k(scores, k):
+    """Indices of the k highest positive scores, best first (ties keep catalog order).
+    Partitions instead of sorting the whole array; only the few candidates at or
+    above the k-th best score get sorted."""
+    idx = np.flatnonzero(scores > 0)
+    if len(idx) > k:
+        kth_best = -np.partition(-scores[idx], k - 1)[k - 1]
+        idx = idx[scores[idx] >= kth_best]
+    return idx[np.argsort(-scores[idx], kind="stable")][:k]
 
 # --- API endpoints ---
 @app.post("/conversation", response_model=StartConvResponse)
-def start_conversation(user_name: Optional[str] = Query("guest")):
-    db = SessionLocal()
+def start_conversation(user_name: Optional[str] = Query("guest"), db: Session = Depends(get_db)):
     conv = Conversation(user_name=user_name)
     db.add(conv)
     db.commit()
     db.refresh(conv)
     return {"conversation_id": conv.id}
 
-@app.post("/conversation/{conv_id}/message", response_model=MessageResponse)
-def post_message(conv_id: int, req: MessageRequest):
-    db = SessionLocal()
-    conv = db.query(Conversation).filter(Conversation.id == conv_id).first()
-    if not conv:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-
-    # store user message
-    m = Message(conversation_id=conv_id, sender="user", text=req.text)
-    db.add(m)
-    db.commit()
-    db.refresh(m)
-
+def normalize_message(text):
+    """Cache key for a chat message: lowercased, surrounding whitespace stripped.
+    Inner whitespace and punctuation are kept since they carry signals
+    ("add to cart" matches but "add  to cart" doesn't; "?", "$10", "gluten-free"),
+    so the reply is exactly what the raw message would get."""
+    return text.lower().strip()
+
+@lru_cache(maxsize=4096)
+def cached_reply(norm_text, catalog):
+    """(interest, matches) for a normalized message against one catalog snapshot;
+    a newer snapshot is a different key, so stale replies are never served
+    (and Catalog clears the cache whenever it publishes one)."""
     # run NLU to extract signals and compute interest
-    signals = extract_signals(req.text)
-    interest = compute_interest(signals)
+    mask, budget = extract_signals(norm_text)
+    interest = compute_interest(mask)
 
-    # find candidate products and score them
-    products = db.query(Product).all()
-    scored = []
-    for p in products:
-        s = product_match_score(p, signals)
-        if s > 0:
-            scored.append((s, p))
-    # sort descending
-    scored.sort(key=lambda x: x[0], reverse=True)
-    # prepare top 6 results
+    # score the whole catalog at once; only the top 6 positive matches are materialized
+    scores = product_match_score(mask, budget, catalog.relevance(norm_text), catalog)
     matches = []
-    for s, p in scored[:6]:
+    for i in top_k(scores, 6):
         matches.append({
-            "product_id": p.product_id,
-            "name": p.name,
-            "category": p.category,
-            "price": p.price,
-            "popularity_score": p.popularity_score,
-            "spice_level": p.spice_level,
-            "image_url": p.image_url,
-            "score": round(s, 2)
+            "product_id": catalog.product_ids[i],
+            "name": catalog.names[i],
+            "category": catalog.categories[i],
+            "price": int(catalog.price_cents[i]) / 100,
+            "popularity_score": int(catalog.pop[i]),
+            "spice_level": int(catalog.spice[i]),
+            "image_url": catalog.image_urls[i],
+            "score": round(float(scores[i]), 2)
         })
+    return interest, tuple(matches)
+
+async def store_messages(conv_id, user_text, bot_text, interest):
+    """Persist a chat turn (user + bot message in one transaction); runs as a
+    background task after the reply is sent."""
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            Message(conversation_id=conv_id, sender="user", text=user_text),
+            Message(conversation_id=conv_id, sender="bot", text=bot_text, interest_score=interest),
+        ])
+        await db.commit()
+
+@app.post("/conversation/{conv_id}/message", response_model=MessageResponse)
+async def post_message(conv_id: int, req: MessageRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    conv = await db.get(Conversation, conv_id)
+    if not conv:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    # repeated messages are served from the reply cache
+    interest, matches = cached_reply(normalize_message(req.text), CATALOG.snapshot)
 
     # bot message (simple templated response)
     if len(matches) == 0:
@@ -309,46 +436,58 @@ def post_message(conv_id: int, req: MessageRequest):
     else:
         bot_text = f"I found {len(matches)} items that match your request. Here are the top picks. Interest score: {interest}%"
 
-    bot_msg = Message(conversation_id=conv_id, sender="bot", text=bot_text, interest_score=interest)
-    db.add(bot_msg)
-    db.commit()
+    # store user + bot messages once the response is out
+    background_tasks.add_task(store_messages, conv_id, req.text, bot_text, interest)
 
-    # return
-    return {
+    # return; the payload is built server-side, so it is sent as-is without
+    # re-validating it against MessageResponse (response_model documents the shape)
+    return ORJSONResponse({
         "bot_text": bot_text,
         "interest_score": interest,
-        "matches": matches
-    }
+        "matches": list(matches)
+    })
+
+products_fts = table("products_fts", column("rowid"))
+
+def fts_query(q):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r"\w+", q.lower())
+    return " ".join(f'"{w}"*' for w in words)
 
 @app.get("/search", response_model=List[SearchResponse])
-def search_products(q: Optional[str] = Query(None), category: Optional[str] = None, max_price: Optional[float] = None):
-    db = SessionLocal()
-    # naive search
-    products = db.query(Product).all()
+async def search_products(q: Optional[str] = Query(None), category: Optional[str] = None, max_price: Optional[float] = Query(None, ge=0, le=MAX_PRICE),
+                          db: AsyncSession = Depends(get_async_db)):
+    # price and category filters run in SQL on indexed columns
+    query = select(Product)
+    if max_price:
+        query = query.where(Product.price_cents <= round(max_price * 100))
+    if category:
+        query = query.where(Product.category_lc == category.lower())
+    # text search goes through the FTS5 index on name/description
+    if q:
+        match = fts_query(q)
+        if not match:
+            return ORJSONResponse([])
+        query = query.join(products_fts, products_fts.c.rowid == Product.id).where(text("products_fts MATCH :match").bindparams(match=match))
+    # ranking and the top-30 cut happen in SQL, so only returned rows are loaded
+    query = query.order_by(Product.popularity_score.desc(), Product.id).limit(30)
+    products = (await db.execute(query)).scalars().all()
     results = []
     for p in products:
-        if category and (p.category or "").lower() != category.lower():
-            continue
-        if max_price and p.price > max_price:
-            continue
-        if q:
-            if q.lower() not in (p.name or "").lower() and q.lower() not in (p.description or "").lower():
-                continue
         # construct score = popularity + simple relevance
         score = (p.popularity_score or 0) / 10.0
         results.append({
             "product_id": p.product_id,
             "name": p.name,
             "category": p.category,
-            "price": p.price,
+            "price": p.price_cents / 100,
             "popularity_score": p.popularity_score,
             "spice_level": p.spice_level,
             "image_url": p.image_url,
             "score": score
         })
-    # sort by score desc
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:30]
+    # trusted server-built rows: skip per-item SearchResponse validation
+    return ORJSONResponse(results)
 
 # --- admin crud (protected by a simple token passed as query param) ---
 ADMIN_TOKEN = "letmein"  # change this for real deployments
@@ -359,7 +498,7 @@ class ProductIn(BaseModel):
     category: Optional[str] = None
     description: Optional[str] = None
     ingredients: Optional[List[str]] = []
-    price: float
+    price: float = Field(ge=0, le=MAX_PRICE)  # dollars; stored as integer cents
     calories: Optional[int] = None
     prep_time: Optional[str] = None
     dietary_tags: Optional[List[str]] = []
@@ -373,17 +512,16 @@ class ProductIn(BaseModel):
     image_url: Optional[str] = None
 
 @app.post("/admin/product")
-def admin_create_product(p: ProductIn, token: str = Query(...)):
+def admin_create_product(p: ProductIn, token: str = Query(...), db: Session = Depends(get_db)):
     if token != ADMIN_TOKEN:
         raise HTTPException(status_code=403, detail="Forbidden")
-    db = SessionLocal()
     prod = Product(
         product_id=p.product_id,
         name=p.name,
         category=p.category,
         description=p.description,
         ingredients=json.dumps(p.ingredients),
-        price=p.price,
+        price_cents=round(p.price * 100),
         calories=p.calories,
         prep_time=p.prep_time,
         dietary_tags=json.dumps(p.dietary_tags),
@@ -398,15 +536,23 @@ def admin_create_product(p: ProductIn, token: str = Query(...)):
     )
     db.add(prod)
     db.commit()
+    # publish a fresh snapshot (which also drops replies computed on the old one)
+    CATALOG.invalidate()
+    _top_products_cache["expires"] = 0.0
     return {"status": "created", "product_id": p.product_id}
 
+# top products barely change; cached for TOP_PRODUCTS_TTL seconds (reset on admin writes)
+TOP_PRODUCTS_TTL = 60
+_top_products_cache = {"expires": 0.0, "top": []}
+
 @app.get("/analytics")
-def analytics():
-    db = SessionLocal()
-    total_products = db.query(Product).count()
-    total_convos = db.query(Conversation).count()
-    total_msgs = db.query(Message).count()
+async def analytics(db: AsyncSession = Depends(get_async_db)):
+    # counters maintained by triggers: one point read instead of three COUNT(*) scans
+    counts = dict((await db.execute(select(Stat.key, Stat.value))).all())
     # simple product popularity top 5
-    prods = db.query(Product).order_by(Product.popularity_score.desc()).limit(5).all()
-    top = [{"product_id": p.product_id, "name": p.name, "popularity_score": p.popularity_score} for p in prods]
-    return {"total_products": total_products, "total_conversations": total_convos, "total_messages": total_msgs, "top_products": top}
+    if time.monotonic() >= _top_products_cache["expires"]:
+        prods = (await db.execute(select(Product).order_by(Product.popularity_score.desc()).limit(5))).scalars().all()
+        _top_products_cache["top"] = [{"product_id": p.product_id, "name": p.name, "popularity_score": p.popularity_score} for p in prods]
+        _top_products_cache["expires"] = time.monotonic() + TOP_PRODUCTS_TTL
+    return {"total_products": counts.get("total_products", 0), "total_conversations": counts.get("total_conversations", 0),
+            "total_messages": counts.get("total_messages", 0), "top_products": _top_products_cache["top"]}
@@ -4,9 +4,10 @@ Creates SQLite DB (products.db) and imports products.json into a products table.
 Also creates tables for conversations and messages for storing chat history.
 """
 import json
-from sqlalchemy import (create_engine, Column, Integer, String, Float, Boolean, Text, DateTime)
+from sqlalchemy import (create_engine, event, text, bindparam, Column, Integer, String, Boolean, Text, DateTime, Computed)
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import datetime
 
 Base = declarative_base()
@@ -19,18 +20,37 @@ class Product(Base):
     category = Column(String)
     description = Column(Text)
     ingredients = Column(Text)      # store lists as JSON string
-    price = Column(Float)
+    price_cents = Column(Integer, index=True)  # price in integer cents
     calories = Column(Integer)
     prep_time = Column(String)
     dietary_tags = Column(Text)     # JSON string
     mood_tags = Column(Text)        # JSON string
     allergens = Column(Text)        # JSON string
+    # lowercased category computed by SQLite (virtual generated column, indexed) for case-insensitive filtering
+    category_lc = Column(String, Computed("lower(category)", persisted=False), index=True)
     popularity_score = Column(Integer)
     chef_special = Column(Boolean)
     limited_time = Column(Boolean)
     spice_level = Column(Integer)
     image_prompt = Column(Text)
     image_url = Column(Text)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)  # catalog version stamp
+
+# full-text index over name/description, kept in sync with products by triggers
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, description, content='products', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+FTS_OBJECTS = {"products_fts", "products_fts_ai", "products_fts_ad", "products_fts_au"}
 
 class Conversation(Base):
     __tablename__ = "conversations"
@@ -47,9 +67,110 @@ class Message(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     interest_score = Column(Integer, nullable=True)  # store score when computed
 
+class Stat(Base):
+    __tablename__ = "stats"
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0)
+
+# row counters kept in stats by triggers, so /analytics reads them instead of COUNT(*) scans;
+# the trailing INSERT OR REPLACE statements (re)sync the counters from the tables
+STATS_COUNTERS = {"total_products": "products", "total_conversations": "conversations", "total_messages": "messages"}
+STATS_DDL = []
+for _key, _table in STATS_COUNTERS.items():
+    STATS_DDL += [
+        f"""CREATE TRIGGER IF NOT EXISTS {_table}_count_ai AFTER INSERT ON {_table} BEGIN
+            UPDATE stats SET value = value + 1 WHERE key = '{_key}';
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {_table}_count_ad AFTER DELETE ON {_table} BEGIN
+            UPDATE stats SET value = value - 1 WHERE key = '{_key}';
+        END""",
+        f"INSERT OR REPLACE INTO stats(key, value) SELECT '{_key}', count(*) FROM {_table}",
+    ]
+STATS_TRIGGERS = {f"{_table}_count_{_op}" for _table in STATS_COUNTERS.values() for _op in ("ai", "ad")}
+
+def set_sqlite_pragmas(dbapi_conn, conn_record):
+    # WAL + synchronous=NORMAL keeps each commit fsync-light
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def transactional_ddl(engine):
+    """pysqlite only opens a transaction before DML; emit BEGIN ourselves so schema
+    changes inside engine.begin() commit or roll back as a whole."""
+    @event.listens_for(engine, "connect")
+    def _no_implicit_begin(dbapi_conn, conn_record):
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+def upgrade_products(conn):
+    """Bring a products table created by an older db_setup (float `price`, no generated
+    or updated_at columns) up to the current schema. SQLite can't add generated columns
+    or retype one in place, so the rows are copied into a freshly created table;
+    conversations and messages are left untouched."""
+    existing = {r[1]: r[6] for r in conn.exec_driver_sql("PRAGMA table_xinfo(products)")}  # name -> hidden flag
+    if not existing:
+        return
+    if set(existing) == {c.name for c in Product.__table__.columns}:
+        # same columns: just drop indexes the model no longer declares (e.g. ix_products_category)
+        declared = {ix.name for ix in Product.__table__.indexes}
+        for (name,) in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'products' AND name LIKE 'ix_products_%'").all():
+            if name not in declared:
+                conn.exec_driver_sql(f'DROP INDEX "{name}"')
+        return
+    # indexes, triggers and the FTS table belong to the old table; they are recreated afterwards
+    for kind, name in conn.exec_driver_sql(
+            "SELECT type, name FROM sqlite_master WHERE tbl_name = 'products' AND type IN ('index', 'trigger') AND sql IS NOT NULL").all():
+        conn.exec_driver_sql(f'DROP {kind.upper()} "{name}"')
+    conn.exec_driver_sql("DROP TABLE IF EXISTS products_fts")
+    conn.exec_driver_sql("ALTER TABLE products RENAME TO products_old")
+    Product.__table__.create(conn)
+
+    # plain columns present in both tables are copied as-is; the rest are derived
+    columns = [c.name for c in Product.__table__.columns if c.computed is None and existing.get(c.name) == 0]
+    values = list(columns)
+    if "price_cents" not in existing and "price" in existing:
+        columns.append("price_cents")
+        values.append("CAST(round(price * 100) AS INTEGER)")
+    if "updated_at" not in existing:
+        columns.append("updated_at")
+        values.append(":now")
+    copy = text(f"INSERT INTO products ({', '.join(columns)}) SELECT {', '.join(values)} FROM products_old")
+    if "updated_at" not in existing:
+        copy = copy.bindparams(bindparam("now", datetime.datetime.utcnow(), type_=DateTime))
+    conn.execute(copy)
+    conn.exec_driver_sql("DROP TABLE products_old")
+
+def init_db(url):
+    """Create the tables, or upgrade them in place, on a short-lived engine.
+    Used by main() and at app startup."""
+    engine = create_engine(url, echo=False)
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    transactional_ddl(engine)
+    Base.metadata.create_all(engine)
+    # older databases are migrated in place. FTS index + stats counters and their triggers
+    # are only (re)created when missing (new database, or dropped by the migration): the
+    # rebuild/resync are O(rows), so an up-to-date database is only read at startup
+    with engine.begin() as conn:
+        upgrade_products(conn)
+        present = {name for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master")}
+        if not FTS_OBJECTS <= present:
+            for stmt in FTS_DDL:
+                conn.exec_driver_sql(stmt)
+            conn.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        if not STATS_TRIGGERS <= present:
+            for stmt in STATS_DDL:
+                conn.exec_driver_sql(stmt)
+    engine.dispose()
+
 def main():
+    init_db("sqlite:///products.db")
     engine = create_engine("sqlite:///products.db", echo=False)
-    Base.metadata.create_all(engine)
+    event.listen(engine, "connect", set_sqlite_pragmas)
     Session = sessionmaker(bind=engine)
     session = Session()
 
@@ -57,31 +178,29 @@ def main():
     with open("products.json", "r", encoding="utf-8") as f:
         products = json.load(f)
 
-    # Insert (idempotent: skip if product exists)
-    for p in products:
-        exists = session.query(Product).filter_by(product_id=p["product_id"]).first()
-        if exists:
-            continue
-        prod = Product(
-            product_id=p["product_id"],
-            name=p["name"],
-            category=p.get("category"),
-            description=p.get("description"),
-            ingredients=json.dumps(p.get("ingredients", [])),
-            price=p.get("price", 0.0),
-            calories=p.get("calories", None),
-            prep_time=p.get("prep_time"),
-            dietary_tags=json.dumps(p.get("dietary_tags", [])),
-            mood_tags=json.dumps(p.get("mood_tags", [])),
-            allergens=json.dumps(p.get("allergens", [])),
-            popularity_score=int(p.get("popularity_score", 0)),
-            chef_special=bool(p.get("chef_special", False)),
-            limited_time=bool(p.get("limited_time", False)),
-            spice_level=int(p.get("spice_level", 0)),
-            image_prompt=p.get("image_prompt"),
-            image_url=p.get("image_url")
-        )
-        session.add(prod)
+    rows = [dict(
+        product_id=p["product_id"],
+        name=p["name"],
+        category=p.get("category"),
+        description=p.get("description"),
+        ingredients=json.dumps(p.get("ingredients", [])),
+        price_cents=int(p["price_cents"]) if "price_cents" in p else round(p["price"] * 100),
+        calories=p.get("calories", None),
+        prep_time=p.get("prep_time"),
+        dietary_tags=json.dumps(p.get("dietary_tags", [])),
+        mood_tags=json.dumps(p.get("mood_tags", [])),
+        allergens=json.dumps(p.get("allergens", [])),
+        popularity_score=int(p.get("popularity_score", 0)),
+        chef_special=bool(p.get("chef_special", False)),
+        limited_time=bool(p.get("limited_time", False)),
+        spice_level=int(p.get("spice_level", 0)),
+        image_prompt=p.get("image_prompt"),
+        image_url=p.get("image_url")
+    ) for p in products]
+
+    # Bulk insert in one transaction (idempotent: existing product_ids are skipped by SQLite)
+    stmt = sqlite_insert(Product.__table__).on_conflict_do_nothing(index_elements=["product_id"])
+    session.execute(stmt, rows)
     session.commit()
     print("Imported products into products.db")
 
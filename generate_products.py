@@ -4,10 +4,10 @@ Generates 100 sample fast-food products and writes them to products.json.
 Each product follows the structure required by the assignment.
 """
 import json
-import random
+import numpy as np
 from datetime import datetime
 
-random.seed(42)
+rng = np.random.default_rng(42)
 
 CATEGORIES = [
     "Burgers", "Pizza", "Fried Chicken", "Tacos & Wraps", "Sides & Appetizers",
@@ -19,53 +19,70 @@ DIETARY = ["vegetarian", "vegan", "contains_gluten", "contains_dairy", "contains
 INGREDIENT_POOL = ["beef patty", "chicken", "pork", "tofu", "kimchi", "gochujang", "brioche bun",
                    "jalapeño", "lime crema", "cheddar", "mozzarella", "bacon", "lettuce", "tomato"]
 
-def make_product(i):
-    pid = f"FF{i:03d}"
-    category = random.choice(CATEGORIES)
-    spice = random.randint(0, 10)
-    price = round(random.uniform(3.99, 19.99), 2)
-    calories = random.randint(150, 950)
-    dietary = []
-    if random.random() < 0.2:
-        dietary.append("vegetarian")
-    if random.random() < 0.1:
-        dietary.append("vegan")
-    if random.random() < 0.5:
-        dietary.append("contains_gluten")
-    if random.random() < 0.4:
-        dietary.append("contains_dairy")
-    mood = random.sample(MOOD_TAGS, k=random.randint(1,2))
-    allergens = []
-    if "contains_gluten" in dietary:
-        allergens.append("gluten")
-    if "contains_dairy" in dietary:
-        allergens.append("dairy")
-    ingredients = random.sample(INGREDIENT_POOL, k= random.randint(3,6))
-    name = f"{random.choice(['Fire','Spicy','Classic','Crispy','Fusion','Smoky','Zesty'])} {random.choice(['Dragon','Ranch','BBQ','Cheese','Garden','Deluxe'])} {random.choice(['Burger','Tacos','Pizza','Wrap','Sandwich','Bowl'])}"
-    description = f"{name}: {' '.join(random.sample(['Bold flavors','handcrafted','crispy','tender','smoky','with a kick','chef-special','perfect for sharing'], 3))}."
-    image_url = f"https://picsum.photos/seed/{pid}/400/300"  # placeholder images
-    return {
-        "product_id": pid,
-        "name": name,
-        "category": category,
-        "description": description,
-        "ingredients": ingredients,
-        "price": price,
-        "calories": calories,
-        "prep_time": f"{random.randint(5,20)} mins",
-        "dietary_tags": dietary,
-        "mood_tags": mood,
-        "allergens": allergens,
-        "popularity_score": random.randint(10, 100),
-        "chef_special": random.random() < 0.12,
-        "limited_time": random.random() < 0.08,
-        "spice_level": spice,
-        "image_prompt": f"{name} {', '.join(ingredients)}",
-        "image_url": image_url
-    }
+NAME_FIRST = ['Fire','Spicy','Classic','Crispy','Fusion','Smoky','Zesty']
+NAME_MIDDLE = ['Dragon','Ranch','BBQ','Cheese','Garden','Deluxe']
+NAME_LAST = ['Burger','Tacos','Pizza','Wrap','Sandwich','Bowl']
+DESCRIPTORS = ['Bold flavors','handcrafted','crispy','tender','smoky','with a kick','chef-special','perfect for sharing']
+
+def sample_rows(n, pool_size):
+    """Row-wise permutations of range(pool_size); slicing a row's prefix is a sample without replacement."""
+    return rng.permuted(np.tile(np.arange(pool_size), (n, 1)), axis=1)
+
+def make_products(n):
+    """Generate n products; every random attribute is drawn for all products in one batch."""
+    category = rng.integers(0, len(CATEGORIES), n)
+    spice = rng.integers(0, 11, n)
+    price_cents = np.round(rng.uniform(3.99, 19.99, n) * 100).astype(int)
+    calories = rng.integers(150, 951, n)
+    is_vegetarian = rng.random(n) < 0.2
+    is_vegan = rng.random(n) < 0.1
+    has_gluten = rng.random(n) < 0.5
+    has_dairy = rng.random(n) < 0.4
+    mood_k = rng.integers(1, 3, n)
+    mood = sample_rows(n, len(MOOD_TAGS))
+    ingredient_k = rng.integers(3, 7, n)
+    ingredient = sample_rows(n, len(INGREDIENT_POOL))
+    name_parts = np.stack([rng.integers(0, len(NAME_FIRST), n), rng.integers(0, len(NAME_MIDDLE), n), rng.integers(0, len(NAME_LAST), n)], axis=1)
+    descriptor = sample_rows(n, len(DESCRIPTORS))[:, :3]
+    prep_time = rng.integers(5, 21, n)
+    popularity = rng.integers(10, 101, n)
+    chef_special = rng.random(n) < 0.12
+    limited_time = rng.random(n) < 0.08
+
+    products = []
+    for i in range(n):
+        pid = f"FF{i + 1:03d}"
+        dietary = [tag for tag, on in zip(["vegetarian", "vegan", "contains_gluten", "contains_dairy"],
+                                          [is_vegetarian[i], is_vegan[i], has_gluten[i], has_dairy[i]]) if on]
+        allergens = [a for a, on in zip(["gluten", "dairy"], [has_gluten[i], has_dairy[i]]) if on]
+        ingredients = [INGREDIENT_POOL[j] for j in ingredient[i, :ingredient_k[i]]]
+        first, middle, last = name_parts[i]
+        name = f"{NAME_FIRST[first]} {NAME_MIDDLE[middle]} {NAME_LAST[last]}"
+        description = f"{name}: {' '.join(DESCRIPTORS[j] for j in descriptor[i])}."
+        image_url = f"https://picsum.photos/seed/{pid}/400/300"  # placeholder images
+        products.append({
+            "product_id": pid,
+            "name": name,
+            "category": CATEGORIES[category[i]],
+            "description": description,
+            "ingredients": ingredients,
+            "price_cents": int(price_cents[i]),
+            "calories": int(calories[i]),
+            "prep_time": f"{prep_time[i]} mins",
+            "dietary_tags": dietary,
+            "mood_tags": [MOOD_TAGS[j] for j in mood[i, :mood_k[i]]],
+            "allergens": allergens,
+            "popularity_score": int(popularity[i]),
+            "chef_special": bool(chef_special[i]),
+            "limited_time": bool(limited_time[i]),
+            "spice_level": int(spice[i]),
+            "image_prompt": f"{name} {', '.join(ingredients)}",
+            "image_url": image_url
+        })
+    return products
 
 def main():
-    products = [make_product(i) for i in range(1, 101)]
+    products = make_products(100)
     with open("products.json", "w", encoding="utf-8") as f:
         json.dump(products, f, indent=2)
     print("Wrote products.json with 100 items.")